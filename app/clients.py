@@ -1,13 +1,30 @@
 import boto3
+import httpx
+from botocore.config import Config
 from openai import OpenAI
 
 from app.core.config import settings
 
 # External clients initialized once and reused.
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# Retries are handled by with_openai_retry; SDK-level retries are disabled so attempts don't multiply.
+openai_client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
 s3_client = boto3.client(
     "s3",
     aws_access_key_id=settings.AWS_ACCESS_KEY,
     aws_secret_access_key=settings.AWS_SECRET_KEY,
     region_name=settings.AWS_REGION,
+    # Single thread-safe client shared by all jobs; size the pool above botocore's default of 10.
+    config=Config(
+        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": 5, "mode": "adaptive"},
+        tcp_keepalive=True,
+    ),
+)
+
+# Shared keep-alive HTTP client for S3 downloads and Spring callbacks (thread-safe, pooled).
+http_client = httpx.Client(
+    http2=True,
+    timeout=httpx.Timeout(60.0, connect=10.0),
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    headers={"User-Agent": "bizportal-ai"},
 )
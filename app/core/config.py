@@ -2,6 +2,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
 
 class Settings(BaseSettings):
+    LOG_LEVEL: str = "INFO"  # logging 모듈을 쓰는 로거(app.*)의 출력 레벨
+
     # OpenAI
     OPENAI_API_KEY: str
     AWS_ACCESS_KEY: str
@@ -9,12 +11,30 @@ class Settings(BaseSettings):
     EMBED_MODEL: str = "text-embedding-3-small"
     EMBED_CHUNK_WORDS: int = 400
     EMBED_CHUNK_OVERLAP: int = 50
+    EMBED_BATCH_SIZE: int = 100  # 임베딩 요청 1회당 최대 청크 수
+    EMBED_BATCH_CHARS: int = 100_000  # 임베딩 요청 1회당 최대 글자 수 (토큰 한도 여유)
+    EMBED_CONCURRENCY: int = 4
     RDB_MODEL: str = "gpt-4o"
 
+    # 챗봇 스트리밍 콜백 묶음 전송 기준
+    CHATBOT_FLUSH_CHARS: int = 256
+    CHATBOT_FLUSH_MS: int = 100
+    RAG_CONCURRENCY: int = 4  # 플랜의 rag_tasks 동시 검색 수
+    PLAN_CACHE_SIZE: int = 10_000
+    PLAN_CACHE_TTL: int = 300  # 초
+
     # AI 모델 설정 (기본값 설정 가능)
     SPLIT_SECONDS: int = 600
+    SPLIT_CONCURRENCY: int = 4  # 청크 추출 ffmpeg 동시 실행 수
     STT_MODEL: str = "whisper-1"
+    STT_CONCURRENCY: int = 4  # 청크 단위 Whisper 동시 호출 수
     SUM_MODEL: str = "gpt-4o"
+    SUMMARIZE_MAP_THRESHOLD: int = 40_000  # 녹취록 글자 수가 이보다 길면 구간별 요약 후 합친다
+    SUMMARY_CONCURRENCY: int = 4
+    JOB_WORKERS: int = 2  # 회의 처리 전용 프로세스 수
+    SUMMARY_BATCH_POLL_SECONDS: int = 60  # 제출된 요약 배치 상태 확인 주기
+    SUMMARY_BATCH_S3_PREFIX: str = "ai/summary-batches/"  # 대기 중 배치 기록 위치 (AWS_BUCKET 내, pod 재시작에도 유지)
+    SUMMARY_BATCH_CLAIM_STALE_SECONDS: int = 600  # 콜백 전송 선점(claim)이 이보다 오래되면 중단된 것으로 보고 다시 처리
 
     # Spring 콜백 설정
     CALLBACK_HEADER: str 
@@ -26,14 +46,20 @@ class Settings(BaseSettings):
     WEAVIATE_HTTP_URL: str | None = "http://localhost:8080"
     WEAVIATE_GRPC_PORT: int = 50051
     WEAVIATE_COLLECTION: str = "ProvDocuments"
+    WEAVIATE_INSERT_WORKERS: int = 4  # insert_many 배치 동시 전송 수
+    WEAVIATE_EAGER_CONNECT: bool = False  # True면 앱 기동 시 Weaviate 연결/컬렉션 확인을 미리 수행
+    WEAVIATE_VECTOR_QUANTIZER: str | None = None  # 새 컬렉션 벡터 압축: None | "sq" | "bq" | "pq"
 
     # RDB (직원 정보 조회 등)
     EMP_DB_DSN: str | None = None  # 예: sqlite:////path/to/file.db 또는 postgres://...
+    RDB_POOL_SIZE: int = 20
+    RDB_MAX_OVERFLOW: int = 10
 
     # AWS S3 설정
     AWS_REGION: str 
     AWS_BUCKET: str 
     PRESIGN_EXPIRE: int = 3600
+    S3_MAX_POOL_CONNECTIONS: int = 50
 
     # .env 파일 위치 (app/core/config.py 기준 루트 폴더의 .env)
     model_config = SettingsConfigDict(
@@ -1,4 +1,12 @@
-from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, status, Body
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from functools import partial
+
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Request, status, Body
 
 import weaviate
 from weaviate.connect import ConnectionParams
@@ -11,11 +19,85 @@ from app.schemas import (
     RunRequest,
 )
 from app.routers.chatbot import router as chatbot_router
-from app.workers.meetings import process_job
+from app.workers.meetings import process_job, send_failed_callback
 from app.workers.prov_documents import process_prov_embedding
-from app.services.provdocuments.weaviate_store import delete_prov_chunks, update_prov_chunks_public
+from app.workers.summary_batches import run_summary_batch_poller
+from app.services.provdocuments.weaviate_store import (
+    close_async_client,
+    delete_prov_chunks,
+    update_prov_chunks_public,
+    warmup,
+)
+
 
-app = FastAPI(title="Meeting AI")
+# uvicorn은 자체 uvicorn.* 로거만 구성하므로 app.* 로거에만 핸들러를 단다.
+# (root를 INFO로 올리면 httpx가 요청마다 남기는 INFO 로그까지 stdout으로 나간다)
+_app_logger = logging.getLogger("app")
+_app_logger.setLevel(settings.LOG_LEVEL.upper())
+if not _app_logger.handlers:
+    _app_log_handler = logging.StreamHandler()
+    _app_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    _app_logger.addHandler(_app_log_handler)
+_app_logger.propagate = False
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.job_pool = _new_job_pool()
+    # worker가 죽거나 취소된 작업의 FAILED 콜백 전송용 (풀 관리 스레드를 HTTP로 막지 않도록 분리)
+    app.state.callback_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="job-callback")
+    if settings.WEAVIATE_EAGER_CONNECT:
+        await warmup()
+    # Batch API 요약은 worker가 제출만 하고, 완료 확인/콜백은 이 가벼운 태스크가 맡는다.
+    batch_poller = asyncio.create_task(run_summary_batch_poller())
+    try:
+        yield
+    finally:
+        batch_poller.cancel()
+        await asyncio.to_thread(_shutdown_jobs, app)
+        await close_async_client()
+
+
+def _new_job_pool() -> ProcessPoolExecutor:
+    # 회의 처리(ffmpeg + STT + 요약)는 무거우므로 요청 스레드풀이 아닌 전용 프로세스 풀에서 실행
+    return ProcessPoolExecutor(
+        max_workers=settings.JOB_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _shutdown_jobs(app: FastAPI):
+    # 대기 중이던 작업은 취소되며, done callback이 FAILED 콜백을 보낸 뒤 종료한다.
+    app.state.job_pool.shutdown(wait=True, cancel_futures=True)
+    app.state.callback_pool.shutdown(wait=True)
+
+
+def _on_job_done(req: RunRequest, callback_pool: ThreadPoolExecutor, fut: Future):
+    # process_job은 자체적으로 FAILED 콜백을 보내므로, 여기서는 결과를 못 낸 경우(취소/프로세스 사망)만 처리한다.
+    if fut.cancelled():
+        reason = "서버 종료로 작업이 취소되었습니다."
+    elif fut.exception() is not None:
+        reason = f"작업 프로세스가 비정상 종료되었습니다: {fut.exception()!r}"
+    else:
+        return
+    print(f"[AI RUN] meetNo={req.meetNo} {reason}")
+    callback_pool.submit(send_failed_callback, req, reason)
+
+
+def _submit_job(app: FastAPI, req: RunRequest) -> Future:
+    try:
+        fut = app.state.job_pool.submit(process_job, req)
+    except BrokenProcessPool:
+        # worker 하나가 죽으면(OOM-kill 등) 풀 전체가 쓸 수 없게 되므로 새 풀로 교체한다.
+        print("[AI RUN] job pool broken, recreating")
+        app.state.job_pool.shutdown(wait=False)
+        app.state.job_pool = _new_job_pool()
+        fut = app.state.job_pool.submit(process_job, req)
+    fut.add_done_callback(partial(_on_job_done, req, app.state.callback_pool))
+    return fut
+
+
+app = FastAPI(title="Meeting AI", lifespan=lifespan)
 app.include_router(chatbot_router)
 
 
@@ -37,13 +119,13 @@ def health():
 
 
 @app.post("/ai/meetings/run")
-def run_ai(req: RunRequest, background: BackgroundTasks):
+async def run_ai(req: RunRequest, request: Request):
     print(f"[AI RUN] meetNo={req.meetNo}, title={req.meetingTitle!r}")
     """
     Spring -> FastAPI 호출용.
-    즉시 200 반환하고, 백그라운드에서 처리 후 callbackUrl로 결과 전송.
+    즉시 200 반환하고, 전용 프로세스 풀에서 처리 후 callbackUrl로 결과 전송.
     """
-    background.add_task(process_job, req)
+    _submit_job(request.app, req)
     return {"queued": True, "meetNo": req.meetNo}
 
 
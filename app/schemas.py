@@ -12,6 +12,7 @@ class RunRequest(BaseModel):
     meetingTitle: Optional[str] = None
     sttModel: Optional[str] = None
     summaryModel: Optional[str] = None
+    batch: bool = False  # True면 요약을 OpenAI Batch API로 처리 (지연 허용 작업용)
 
 
 class ProvEmbeddingRequest(BaseModel):
@@ -1,10 +1,15 @@
+import hashlib
 import json
-from typing import List, Literal, Optional
+import re
+import threading
+from typing import List, Literal, Optional, Tuple
 
+from cachetools import TTLCache
 from pydantic import BaseModel, ValidationError
 
 from app.clients import openai_client
 from app.core.config import settings
+from app.services.openai_retry import with_openai_retry
 from app.services.chatbot.utils import _history_to_text, clean_json_string
 
 
@@ -25,38 +30,102 @@ class QueryPlan(BaseModel):
     answer_style: Optional[str] = None
 
 
+# 한 가지 의도가 분명한 짧은 질문은 LLM 플래너 없이 바로 플랜을 만든다.
+# 여러 모드가 동시에 걸리면(예: "결재 규정") 모호하므로 LLM에 맡긴다.
+_FAST_PATH_MAX_LEN = 40
+# "회의실 예약 방법", "메일 보내는 법"처럼 방법/절차를 묻는 질문은 데이터 조회가 아니므로 fast path에서 제외
+_HOWTO_MARKERS = re.compile(r"방법|어떻게|절차|(?:하|는|쓰)\s*법|가능|할\s*수\s*있")
+# rdb fast path는 "내/오늘 ... 보여줘/조회/목록"처럼 조회 의도가 드러난 경우에만 탄다.
+_LOOKUP_MARKERS = re.compile(r"보여|조회|목록|리스트|알려|몇\s*(?:개|건|명)|언제|누구|확인|뭐\s*있|있어|있나")
+_FAST_RULES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"할\s*일|투두|todo", re.IGNORECASE), "rdb"),
+    (re.compile(r"일정|스케줄"), "rdb"),
+    (re.compile(r"예약"), "rdb"),
+    (re.compile(r"회의록|회의실"), "rdb"),
+    (re.compile(r"메일"), "rdb"),
+    (re.compile(r"결재"), "rdb"),
+    (re.compile(r"근태|출근|퇴근"), "rdb"),
+    (re.compile(r"연락처|전화번호|내선"), "rdb"),
+    (re.compile(r"규정|규약|조항|사규|정책|지침"), "rag"),
+]
+
+
+def _fast_plan(question: str) -> Optional[QueryPlan]:
+    if len(question) > _FAST_PATH_MAX_LEN or _HOWTO_MARKERS.search(question):
+        return None
+    modes = {mode for pattern, mode in _FAST_RULES if pattern.search(question)}
+    if len(modes) != 1:
+        return None
+    mode = modes.pop()
+    if mode == "rag":
+        return QueryPlan(mode="rag", rag_tasks=[RagTask(query=question)])
+    if not _LOOKUP_MARKERS.search(question):
+        return None
+    return QueryPlan(mode="rdb")
+
+
+# 이전 대화가 없는 질문의 플랜만 캐시 (대화 맥락이 있으면 같은 질문이라도 플랜이 달라질 수 있음)
+_plan_cache: TTLCache = TTLCache(maxsize=settings.PLAN_CACHE_SIZE, ttl=settings.PLAN_CACHE_TTL)
+_plan_cache_lock = threading.Lock()
+
+
+def _plan_cache_key(question: str, com_id: Optional[str]) -> str:
+    normalized = " ".join(question.lower().split())
+    return hashlib.blake2s(f"{normalized}|{com_id or ''}".encode()).hexdigest()
+
+
+SYSTEM_PROMPT_PLAN = (
+    "너는 사내 챗봇 플래너다. 질문을 해결하기 위해 DB 조회(RDB), 규정 검색(RAG), 또는 둘 다(Hybrid) 계획을 JSON으로만 출력한다.\n"
+    "- mode: rdb | rag | hybrid\n"
+    "- rag_tasks: [{\"query\": \"...\", \"top_k\": 5}]\n"
+    "- rdb_tasks: [{\"name\": \"task_name\", \"args\": {...}}]\n"
+    "- answer_style: 요약/비교/추천 등 힌트\n"
+    "규정/정책/조항 해석은 rag, 직원/회사 데이터/개수/목록/일정/예약/연락처는 rdb, 둘 다 필요하면 hybrid.\n"
+    "DB 조회는 허용된 테이블 범위 내에서만 계획해야 한다.\n"
+    "JSON만 출력하고, 설명은 쓰지 마.\n"
+    "이전 대화는 참고만 하고, 현재 질문을 최우선으로 계획을 세워라."
+)
+
+
+@with_openai_retry()
+def _request_plan(user_block: str) -> str:
+    resp = openai_client.chat.completions.create(
+        model=settings.RDB_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT_PLAN},
+            {"role": "user", "content": user_block},
+        ],
+        temperature=0,
+    )
+    return resp.choices[0].message.content or "{}"
+
+
 def plan_query(question: str, history, emp_id: str, com_id: Optional[str]) -> QueryPlan:
     """
     LLM 기반 플래너: rdb/rag/hybrid 플랜(JSON)을 생성하고 검증한다.
     """
     history_text = _history_to_text(history)
+    if not history_text:
+        fast = _fast_plan(question.strip())
+        if fast is not None:
+            print(f"[PLANNER] fast path mode={fast.mode}")
+            return fast
+
+    cache_key = None if history_text else _plan_cache_key(question, com_id)
+    if cache_key:
+        with _plan_cache_lock:
+            cached = _plan_cache.get(cache_key)
+        if cached is not None:
+            print(f"[PLANNER] cache hit mode={cached.mode}")
+            return cached.model_copy(deep=True)
+
     user_block = (
         f"[이전 대화]\n{history_text}\n\n[현재 질문]\n{question}"
         if history_text
         else question
     )
-    system_prompt = (
-        "너는 사내 챗봇 플래너다. 질문을 해결하기 위해 DB 조회(RDB), 규정 검색(RAG), 또는 둘 다(Hybrid) 계획을 JSON으로만 출력한다.\n"
-        "- mode: rdb | rag | hybrid\n"
-        "- rag_tasks: [{\"query\": \"...\", \"top_k\": 5}]\n"
-        "- rdb_tasks: [{\"name\": \"task_name\", \"args\": {...}}]\n"
-        "- answer_style: 요약/비교/추천 등 힌트\n"
-        "규정/정책/조항 해석은 rag, 직원/회사 데이터/개수/목록/일정/예약/연락처는 rdb, 둘 다 필요하면 hybrid.\n"
-        "DB 조회는 허용된 테이블 범위 내에서만 계획해야 한다.\n"
-        "JSON만 출력하고, 설명은 쓰지 마.\n"
-        "이전 대화는 참고만 하고, 현재 질문을 최우선으로 계획을 세워라."
-    )
     try:
-        resp = openai_client.chat.completions.create(
-            model=settings.RDB_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_block},
-            ],
-            temperature=0,
-        )
-        
-        raw = resp.choices[0].message.content or "{}"
+        raw = _request_plan(user_block)
         
         # --- [수정 시작] ---
         # 1. 디버깅을 위해 LLM이 내뱉은 원문을 출력합니다.
@@ -67,7 +136,11 @@ def plan_query(question: str, history, emp_id: str, com_id: Optional[str]) -> Qu
         # --- [수정 끝] ---
 
         plan_dict = json.loads(raw)
-        return QueryPlan(**plan_dict)
+        plan = QueryPlan(**plan_dict)
+        if cache_key:
+            with _plan_cache_lock:
+                _plan_cache[cache_key] = plan.model_copy(deep=True)
+        return plan
 
     except (ValidationError, json.JSONDecodeError) as e:
         # 여기서 에러가 발생할 때 raw 값을 출력하면 원인 파악이 쉽습니다.
@@ -3,6 +3,7 @@ from typing import Iterable, List, Optional
 
 from app.clients import openai_client
 from app.core.config import settings
+from app.services.openai_retry import with_openai_retry
 from app.schemas import ChatHistoryMessage
 from app.services.chatbot.utils import _history_to_text, clean_json_string
 
@@ -14,36 +15,52 @@ _ACTIONS = [
 ]
 
 
-def _suggest_action(question: str, history: List[ChatHistoryMessage] | None, db_text: str, rag_text: str) -> Optional[dict]:
-    action_list = "\n".join(
-        [f"- {a['id']} (params: {a['requiredParams']})" for a in _ACTIONS]
+# 정적인 system 프롬프트는 모듈 상수로 한 번만 만든다. (프리픽스가 고정되어 프롬프트 캐싱에도 유리)
+_ACTION_LIST = "\n".join(f"- {a['id']} (params: {a['requiredParams']})" for a in _ACTIONS)
+
+SYSTEM_PROMPT_ACTION = (
+    "아래 액션 목록 중 적절한 이동 액션을 하나 선택하고 JSON만 출력하세요. "
+    "이메일 관련 질문이 들어오면 메일 작성 액션을 선택합니다. "
+    "에약 관련 질문이 들어오면 내 예약 조회 액션을 선택합니다 "
+    "일정 관련 질문이 들어오면 오늘 일정 액션을 선택합니다 "
+    "결재 작성 질문이 들어오면 결재 작성을 선택합니다 "
+    "적절한 액션이 없으면 null을 출력합니다. "
+    "형식: {\"actionId\": \"...\", \"params\": {\"key\": \"val\"}} 또는 null. "
+    f"액션 목록:\n{_ACTION_LIST}\n"
+    "이전 대화는 보조 정보이며, 현재 질문/DB/RAG 근거를 우선하라."
+)
+
+SYSTEM_PROMPT_SYNTH = (
+    "너는 사내 전자결재/그룹웨어 챗봇이다. DB 결과는 사실, 규정 근거는 정책이다. "
+    "출처가 없는 내용은 추측하지 말고, 필요시 근거/데이터 부족을 명시한다."
+)
+
+
+@with_openai_retry()
+def _create_completion(model: str, messages: List[dict], stream: bool = False):
+    # stream=True일 때는 스트림 연결 생성까지만 재시도 대상 (받기 시작한 스트림은 재시도하지 않음)
+    return openai_client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0,
+        stream=stream,
     )
+
+
+def _suggest_action(question: str, history: List[ChatHistoryMessage] | None, db_text: str, rag_text: str) -> Optional[dict]:
     history_text = _history_to_text(history)
     user_block = (
         f"[이전 대화]\n{history_text}\n\n[질문]\n{question}\n\n[DB]\n{db_text}\n\n[RAG]\n{rag_text}"
         if history_text
         else f"[질문]\n{question}\n\n[DB]\n{db_text}\n\n[RAG]\n{rag_text}"
     )
-    system_prompt = (
-        "아래 액션 목록 중 적절한 이동 액션을 하나 선택하고 JSON만 출력하세요. "
-        "이메일 관련 질문이 들어오면 메일 작성 액션을 선택합니다. "
-        "에약 관련 질문이 들어오면 내 예약 조회 액션을 선택합니다 "
-        "일정 관련 질문이 들어오면 오늘 일정 액션을 선택합니다 "
-        "결재 작성 질문이 들어오면 결재 작성을 선택합니다 "
-        "적절한 액션이 없으면 null을 출력합니다. "
-        
-        "형식: {\"actionId\": \"...\", \"params\": {\"key\": \"val\"}} 또는 null. "
-        f"액션 목록:\n{action_list}"
-        "이전 대화는 보조 정보이며, 현재 질문/DB/RAG 근거를 우선하라."
-    )
     try:
-        resp = openai_client.chat.completions.create(
-            model=settings.RDB_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
+        resp = _create_completion(
+            settings.RDB_MODEL,
+            [
+                {"role": "system", "content": SYSTEM_PROMPT_ACTION},
                 {"role": "user", "content": user_block},
             ],
-            temperature=0,
         )
         raw = resp.choices[0].message.content or "null"
         print(f"[SYNTH] action raw response: {raw!r}")
@@ -61,6 +78,23 @@ def _suggest_action(question: str, history: List[ChatHistoryMessage] | None, db_
     return None
 
 
+def _build_messages(question: str, db_text: str, rag_text: str, answer_style: str | None) -> List[dict]:
+    style_hint = f"답변 스타일: {answer_style}" if answer_style else ""
+    user_prompt = (
+        "아래 DB 결과와 규정 근거를 활용해 한국어로 간결하고 정확하게 답변하세요. "
+        "DB는 사실 데이터, RAG는 규정/정책 근거입니다. 정보가 없으면 모른다고 말하세요. "
+        "이전 대화는 보조 정보이며, 현재 질문/DB/RAG 근거를 우선하라."
+        f"{style_hint}\n\n"
+        f"[질문]\n{question}\n\n"
+        f"[DB 결과]\n{db_text or '(없음)'}\n\n"
+        f"[규정 근거]\n{rag_text or '(없음)'}"
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT_SYNTH},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
 def stream_final_answer(
     question: str,
     history: List[ChatHistoryMessage] | None,
@@ -73,59 +107,23 @@ def stream_final_answer(
     DB와 RAG 근거를 모두 사용해 최종 답변을 스트리밍한다.
     반환: {"chunk": str} 또는 마지막에는 {"done": True, "action": {...}} 형태
     """
-    style_hint = f"답변 스타일: {answer_style}" if answer_style else ""
-    user_prompt = (
-        "아래 DB 결과와 규정 근거를 활용해 한국어로 간결하고 정확하게 답변하세요. "
-        "DB는 사실 데이터, RAG는 규정/정책 근거입니다. 정보가 없으면 모른다고 말하세요. "
-        "이전 대화는 보조 정보이며, 현재 질문/DB/RAG 근거를 우선하라."
-        f"{style_hint}\n\n"
-        f"[질문]\n{question}\n\n"
-        f"[DB 결과]\n{db_text or '(없음)'}\n\n"
-        f"[규정 근거]\n{rag_text or '(없음)'}"
-    )
-    
+    messages = _build_messages(question, db_text, rag_text, answer_style)
+
     print("question + db_text + rag_ text "+ question+" "+db_text+ " "+ rag_text)
     try:
-        resp = openai_client.chat.completions.create(
-            model=settings.SUM_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "너는 사내 전자결재/그룹웨어 챗봇이다. DB 결과는 사실, 규정 근거는 정책이다. "
-                        "출처가 없는 내용은 추측하지 말고, 필요시 근거/데이터 부족을 명시한다."
-                    ),
-                },
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0,
-            stream=True,
-        )
+        resp = _create_completion(settings.SUM_MODEL, messages, stream=True)
         for chunk in resp:
-            delta = chunk.choices[0].delta.content
-            if delta:
-                yield {"chunk": delta}
-        action = _suggest_action(question, history, db_text, rag_text)
-        yield {"done": True, "action": action}
+            if not chunk.choices:
+                continue
+            delta: str | None = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            yield {"chunk": delta}
     except Exception:
-        resp = openai_client.chat.completions.create(
-            model=settings.SUM_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "너는 사내 전자결재/그룹웨어 챗봇이다. DB 결과는 사실, 규정 근거는 정책이다. "
-                        "출처가 없는 내용은 추측하지 말고, 필요시 근거/데이터 부족을 명시한다."
-                    ),
-                },
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0,
-        )
+        # 스트리밍 실패 시 비스트리밍으로 한 번에 받아 그대로 전달 (콜백 쪽에서 묶음 전송)
+        resp = _create_completion(settings.SUM_MODEL, messages)
         full = resp.choices[0].message.content or ""
-        for para in full.split("\n\n"):
-            part = para.strip()
-            if part:
-                yield {"chunk": part + "\n"}
-        action = _suggest_action(question, history, db_text, rag_text)
-        yield {"done": True, "action": action}
+        if full:
+            yield {"chunk": full}
+    action = _suggest_action(question, history, db_text, rag_text)
+    yield {"done": True, "action": action}
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 
 from sqlalchemy import text
 
@@ -16,7 +16,7 @@ def _limit_clause(limit: int | None, default: int = 50) -> str:
 
 
 
-def format_rows(rows: List[Dict[str, Any]], max_rows: int = 10) -> str:
+def format_rows(rows: Sequence[Mapping[str, Any]], max_rows: int = 10) -> str:
     if not rows:
         return ""
     sample = rows[:max_rows]
@@ -26,5 +26,6 @@ def format_rows(rows: List[Dict[str, Any]], max_rows: int = 10) -> str:
         line = " | ".join(str(r.get(h, "")) for h in headers)
         lines.append(line)
     if len(rows) > max_rows:
-        lines.append(f"...({len(rows) - max_rows} more)")
+        # 조회 자체가 LIMIT으로 잘려 있으므로 남은 건수 대신 더 있다는 사실만 표시
+        lines.append("...(more rows)")
     return "\n".join(lines)
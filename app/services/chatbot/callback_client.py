@@ -2,7 +2,7 @@ import time
 from typing import Any
 from urllib.parse import urlparse
 
-import httpx
+from app.clients import http_client
 
 
 def validate_callback_url(url: str) -> str:
@@ -28,9 +28,7 @@ def post_with_retry(callback_url: str, callback_key: str, payload: dict[str, Any
         if delay:
             time.sleep(delay)
         try:
-            with httpx.Client(timeout=timeout) as http:
-                res = http.post(callback_url, headers=headers, json=payload)
-
+            res = http_client.post(callback_url, headers=headers, json=payload, timeout=timeout)
             res.raise_for_status()
             return
         except Exception as e:
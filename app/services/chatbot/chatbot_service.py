@@ -1,7 +1,10 @@
-from typing import Iterable, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Mapping, Sequence
 
+from app.core.config import settings
 from app.schemas import ChatbotRunRequest
-from app.services.chatbot.agent_planner import plan_query
+from app.services.chatbot.agent_planner import RagTask, plan_query
 from app.services.chatbot.agent_synthesizer import stream_final_answer
 from app.services.chatbot.callback_client import post_with_retry, validate_callback_url
 from app.services.provdocuments.weaviate_store import search_prov_chunks
@@ -9,21 +12,26 @@ from app.services.chatbot.rdb_service import query_db_with_llm
 from app.services.chatbot.agent_tools import format_rows
 from app.services.chatbot.utils import _history_to_text
 
+# 답변 근거로 넘기는 DB 행 수. SQL LIMIT은 여기에 1을 더해, 잘린 결과가 있는지만 알 수 있게 한다.
+DB_TEXT_MAX_ROWS = 10
+
+
+def _search_rag_task(t: RagTask) -> List[str]:
+    try:
+        return search_prov_chunks(t.query, top_k=t.top_k)
+    except Exception as e:
+        print(f"[RAG] search failed for {t.query}: {e}")
+        return []
 
-def _run_rag_tasks(rag_tasks, question: str) -> List[str]:
-    contexts: List[str] = []
-    tasks = rag_tasks or []
-    if not tasks:
-        tasks = [{"query": question, "top_k": 5}]
-    for t in tasks:
-        q = t.get("query") if isinstance(t, dict) else getattr(t, "query", question)
-        top_k = t.get("top_k") if isinstance(t, dict) else getattr(t, "top_k", 5)
-        try:
-            res = search_prov_chunks(q, top_k=top_k)
-            contexts.extend(res)
-        except Exception as e:
-            print(f"[RAG] search failed for {q}: {e}")
-    return contexts
+
+def _run_rag_tasks(rag_tasks: List[RagTask], question: str) -> List[str]:
+    tasks = rag_tasks or [RagTask(query=question)]
+    if len(tasks) == 1:
+        return _search_rag_task(tasks[0])
+    # 검색(임베딩 + Weaviate)은 네트워크 대기 위주라 태스크별로 동시에 실행하고, 결과는 태스크 순서대로 합친다.
+    with ThreadPoolExecutor(max_workers=min(len(tasks), settings.RAG_CONCURRENCY)) as ex:
+        results = list(ex.map(_search_rag_task, tasks))
+    return [ctx for res in results for ctx in res]
 
 
 def run_chatbot(req: ChatbotRunRequest):
@@ -35,22 +43,22 @@ def run_chatbot(req: ChatbotRunRequest):
         plan = plan_query(req.question, req.history, req.empId, req.comId)
         print(f"[CHATBOT] plan mode={plan.mode} rag_tasks={len(plan.rag_tasks)} rdb_tasks={len(plan.rdb_tasks)}")
 
-        db_rows: List[dict] = []
+        db_rows: Sequence[Mapping[str, Any]] = []
         rag_contexts: List[str] = []
 
         if plan.mode in {"rdb", "hybrid"}:
             # 자동 Text-to-SQL만 사용 (사전 정의 태스크 미사용)
             try:
-                db_rows = query_db_with_llm(req.question, req.comId, req.empId)
-                print(f"[CHATBOT] db_rows: {db_rows}")
+                db_rows = query_db_with_llm(req.question, req.comId, req.empId, limit=DB_TEXT_MAX_ROWS + 1)
+                print(f"[CHATBOT] db_rows count={len(db_rows)} preview={[dict(r) for r in db_rows[:3]]}")
             except Exception as e:
                 import traceback
                 print(f"[CHATBOT] LLM SQL failed: {e}\n{traceback.format_exc()}")
 
         if plan.mode in {"rag", "hybrid"}:
-            rag_contexts.extend(_run_rag_tasks([t.model_dump() for t in plan.rag_tasks], req.question))
+            rag_contexts.extend(_run_rag_tasks(plan.rag_tasks, req.question))
 
-        db_text = format_rows(db_rows)
+        db_text = format_rows(db_rows, DB_TEXT_MAX_ROWS)
         print("[CHATBOT] db_text: "+db_text)
         rag_text = "\n".join(rag_contexts)
         print("[CHATBOT] rag_text: "+rag_text)
@@ -71,18 +79,19 @@ def run_chatbot(req: ChatbotRunRequest):
         )
 
         try:
-            import time
-
-            flush_interval_s = 0.1
+            flush_interval_s = settings.CHATBOT_FLUSH_MS / 1000
+            flush_chars = settings.CHATBOT_FLUSH_CHARS
             seq = 0
             full_answer_parts: List[str] = []
-            buffer_text = ""
+            buffer_parts: List[str] = []
+            buffer_len = 0
             last_flush = time.monotonic()
 
             def _flush_buffer():
-                nonlocal buffer_text, seq, last_flush
-                if not buffer_text:
+                nonlocal buffer_parts, buffer_len, seq, last_flush
+                if not buffer_parts:
                     return
+                buffer_text = "".join(buffer_parts)
                 payload = {
                     "messageId": req.messageId,
                     "chunk": buffer_text,
@@ -93,15 +102,18 @@ def run_chatbot(req: ChatbotRunRequest):
                 print(f"[CHATBOT] stream chunk seq={seq} messageId={req.messageId} size={len(buffer_text)}")
                 seq += 1
                 post_with_retry(callback_url, req.callbackKey, payload)
-                buffer_text = ""
+                buffer_parts = []
+                buffer_len = 0
                 last_flush = time.monotonic()
 
+            # 토큰 단위 delta마다 콜백하지 않고, 일정 글자 수나 시간 창 단위로 모아서 전송
             for delta in stream:
                 if delta.get("chunk"):
                     chunk = delta["chunk"]
                     full_answer_parts.append(chunk)
-                    buffer_text += chunk
-                    if time.monotonic() - last_flush >= flush_interval_s:
+                    buffer_parts.append(chunk)
+                    buffer_len += len(chunk)
+                    if buffer_len >= flush_chars or time.monotonic() - last_flush >= flush_interval_s:
                         _flush_buffer()
                 if delta.get("done"):
                     _flush_buffer()
@@ -1,12 +1,13 @@
 import re
 from functools import lru_cache
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.engine import Engine
+from sqlalchemy import create_engine, inspect, make_url, text
+from sqlalchemy.engine import Engine, RowMapping
 
 from app.clients import openai_client
 from app.core.config import settings
+from app.services.openai_retry import with_openai_retry
 from app.services.chatbot.utils import ALLOWED_TABLES, PERSONAL_TABLES
 
 EMPLOYEE_ALLOWED_COLUMNS = {"emp_id", "emp_name", "email", "work_phone", "msg_stat", "delegate"}
@@ -15,7 +16,15 @@ EMPLOYEE_ALLOWED_COLUMNS = {"emp_id", "emp_name", "email", "work_phone", "msg_st
 def get_engine() -> Engine:
     if not settings.EMP_DB_DSN:
         raise RuntimeError("EMP_DB_DSN이 설정되지 않았습니다. 직원 DB DSN을 .env에 설정하세요.")
-    return create_engine(settings.EMP_DB_DSN, pool_pre_ping=True)
+    pool_kwargs: Dict[str, Any] = {}
+    # sqlite는 QueuePool 크기 옵션을 지원하지 않는 풀을 쓸 수 있으므로 크기 설정은 서버형 DB에만 적용
+    if make_url(settings.EMP_DB_DSN).get_backend_name() != "sqlite":
+        pool_kwargs = {
+            "pool_size": settings.RDB_POOL_SIZE,
+            "max_overflow": settings.RDB_MAX_OVERFLOW,
+            "pool_recycle": 1800,
+        }
+    return create_engine(settings.EMP_DB_DSN, pool_pre_ping=True, **pool_kwargs)
 
 
 def _schema_summary() -> str:
@@ -31,9 +40,37 @@ def _schema_summary() -> str:
             continue
         cols = [c["name"] for c in insp.get_columns(table)]
         lines.append(f"{table}({', '.join(cols)})")
+    fulltext = _fulltext_indexes()
+    if fulltext:
+        lines.append("[FULLTEXT 인덱스]")
+        for table, index_cols in sorted(fulltext.items()):
+            for cols in index_cols:
+                lines.append(f"{table}({', '.join(cols)})")
     return "\n".join(lines)
 
 
+@lru_cache(maxsize=1)
+def _fulltext_indexes() -> Dict[str, List[Tuple[str, ...]]]:
+    """
+    허용 테이블의 MySQL/MariaDB FULLTEXT 인덱스 컬럼 목록. (텍스트 검색을 MATCH ... AGAINST로 유도하기 위함)
+    """
+    engine = get_engine()
+    dialect = engine.dialect.name
+    if dialect not in {"mysql", "mariadb"}:
+        return {}
+    insp = inspect(engine)
+    allowed = {t.lower() for t in ALLOWED_TABLES}
+    indexes: Dict[str, List[Tuple[str, ...]]] = {}
+    for table in insp.get_table_names():
+        if table.lower() not in allowed:
+            continue
+        for idx in insp.get_indexes(table):
+            options = idx.get("dialect_options") or {}
+            if options.get(f"{dialect}_prefix") == "FULLTEXT":
+                indexes.setdefault(table.lower(), []).append(tuple(idx["column_names"]))
+    return indexes
+
+
 @lru_cache(maxsize=1)
 def _table_columns() -> Dict[str, set]:
     engine = get_engine()
@@ -62,6 +99,7 @@ def _strip_column_filter(sql: str, column: str) -> str:
     return updated
 
 
+@with_openai_retry()
 def _generate_select_sql(question: str, schema: str, com_id: Optional[str]) -> str:
     """
     LLM으로 안전한 SELECT 쿼리를 생성합니다. DDL/DML 금지.
@@ -81,7 +119,10 @@ def _generate_select_sql(question: str, schema: str, com_id: Optional[str]) -> s
     prompt = (
         "다음 질문을 SQL SELECT 한 개로 변환하세요. 테이블/컬럼은 스키마에 명시된 것만 사용합니다. "
         f"허용 테이블만 사용하세요: {allowed_tables}. "
-        "INSERT/UPDATE/DELETE/DDL은 금지. LIMIT 20 이하로 설정하세요. 이름/텍스트 검색은 LIKE '%키워드%'를 사용하세요. "
+        "INSERT/UPDATE/DELETE/DDL은 금지. LIMIT 20 이하로 설정하세요. "
+        "텍스트 검색 대상 컬럼이 [FULLTEXT 인덱스]에 있으면 인덱스 컬럼 목록 그대로 "
+        "MATCH(컬럼들) AGAINST('키워드*' IN BOOLEAN MODE)를 사용하고, 키워드가 3글자 미만이거나 인덱스가 없으면 "
+        "LIKE '%키워드%'를 사용하세요. "
         f"{extra}"
         "답변은 코드펜스 없이 SQL만 출력하고, 세미콜론은 붙이지 마세요.\n\n"
         f"[스키마]\n{schema}\n\n[질문]\n{question}"
@@ -112,12 +153,15 @@ def _is_safe_select(sql: str) -> bool:
     return not any(f" {b} " in lowered for b in banned)
 
 
-def _ensure_limit(sql: str, default_limit: int = 50) -> str:
+def _ensure_limit(sql: str, default_limit: int = 50) -> Tuple[str, Dict[str, Any]]:
+    """
+    ORDER BY 뒤에 LIMIT을 바인드 파라미터로 붙인다. (리터럴 대신 파라미터라 SQL 문이 질의마다 같아진다)
+    """
     if re.search(r"\blimit\b", sql, re.IGNORECASE):
-        return sql
-    limited = f"{sql} LIMIT {default_limit}"
-    print(f"[RDB] limit applied -> {limited}")
-    return limited
+        return sql, {}
+    limited = f"{sql} LIMIT :row_limit"
+    print(f"[RDB] limit applied -> {limited} row_limit={default_limit}")
+    return limited, {"row_limit": default_limit}
 
 
 def _extract_tables(sql: str) -> List[str]:
@@ -169,19 +213,18 @@ def _ensure_allowed_tables(sql: str):
     print(f"[RDB] allowed tables: {tables}")
 
 
-def execute_select(sql: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+def execute_select(sql: str, params: Optional[Dict[str, Any]] = None) -> Sequence[RowMapping]:
     """
-    SELECT만 실행. 결과를 dict 리스트로 반환.
+    SELECT만 실행. 결과를 RowMapping 리스트로 반환 (dict 변환 없이 그대로 사용).
     """
     if not _is_safe_select(sql):
         raise RuntimeError("허용되지 않는 SQL입니다. SELECT만 지원합니다.")
 
-    engine = get_engine()
-    with engine.connect() as conn:
-        print(f"[RDB] executing SQL -> {sql} params={params}")
+    print(f"[RDB] executing SQL -> {sql} params={params}")
+    with get_engine().connect() as conn:
         rows = conn.execute(text(sql), params or {}).mappings().all()
-        print(f"[RDB] rows fetched={len(rows)}")
-        return [dict(r) for r in rows]
+    print(f"[RDB] rows fetched={len(rows)}")
+    return rows
 
 
 def _ensure_com_filter(sql: str, com_id: Optional[str]) -> Tuple[str, Dict[str, Any]]:
@@ -224,9 +267,14 @@ def _ensure_personal_filter(sql: str, tables: List[str], emp_id: Optional[str])
     return sql, params
 
 
-def query_db_with_llm(question: str, com_id: Optional[str], emp_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def query_db_with_llm(
+    question: str,
+    com_id: Optional[str],
+    emp_id: Optional[str] = None,
+    limit: int = 50,
+) -> Sequence[RowMapping]:
     """
-    질문을 SQL로 변환 후 실행. 결과 반환.
+    질문을 SQL로 변환 후 실행. 결과 반환. limit은 SQL LIMIT으로 적용된다.
     """
     schema = _schema_summary()
     sql = _generate_select_sql(question, schema, com_id)
@@ -245,7 +293,8 @@ def query_db_with_llm(question: str, com_id: Optional[str], emp_id: Optional[str
     params.update(p_params)
     
     # 3. 모든 필터가 적용된 '최종 SQL'에 LIMIT을 마지막으로 추가
-    final_sql = _ensure_limit(p_sql)
+    final_sql, limit_params = _ensure_limit(p_sql, limit)
+    params.update(limit_params)
     
     print(f"[RDB] final sql -> {final_sql} params={params}")
     return execute_select(final_sql, params)
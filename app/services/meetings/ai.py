@@ -1,9 +1,13 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from app.clients import openai_client
+from app.services.openai_retry import with_openai_retry
 
 
+@with_openai_retry()
 def whisper_transcribe(file_path: Path, model_name: str) -> str:
     with open(file_path, "rb") as f:
         tr = openai_client.audio.transcriptions.create(
@@ -13,19 +17,21 @@ def whisper_transcribe(file_path: Path, model_name: str) -> str:
     return tr.text or ""
 
 
-def gpt_summarize(transcribed_text: str, model_name: str, meeting_title: Optional[str] = None) -> str:
-    title_line = f"회의 제목: {meeting_title}" if meeting_title else "회의 제목: (제공되지 않음)"
-    detailed_prompt = f"""
-당신은 전문적인 회의록 작성 서기입니다. 
+# 고정 지침은 system 메시지 상수로 두고, 회의마다 달라지는 제목/녹취록만 user 메시지로 보낸다.
+# (요청마다 프리픽스가 동일해야 OpenAI 프롬프트 캐싱이 적용된다)
+SYSTEM_PROMPT_SUMMARY = """
+You are a professional meeting minutes assistant. You create detailed, structured reports in Korean.
+
+당신은 전문적인 회의록 작성 서기입니다.
 제공된 녹취록은 화자 분리가 되어 있지 않으므로, 다음 지침에 따라 상세한 회의록을 작성해 주세요.
 
 1. 맥락 파악: 대화 내용 중 이름이나 직함이 언급되면 이를 바탕으로 발언자를 최대한 유추하세요.
 2. 내용 중심 정리: 발언자가 명확하지 않은 경우 무리하게 특정하지 말고, 논의된 '내용'과 '의견의 흐름'을 중심으로 정리하세요.
 3. Action Items: 할 일의 담당자가 명시되지 않았다면 '관련 부서 확인 필요' 또는 '회의 참여자 전체' 등으로 표기하세요.
 
-반드시 다음 형식을 지켜주세요:
+반드시 다음 형식을 지켜주세요 (첫 줄은 사용자 메시지의 회의 제목 줄을 그대로 사용):
 
-{title_line}
+회의 제목: ...
 
 ## 1. 회의 개요
 - 주제와 목적 요약
@@ -38,20 +44,158 @@ def gpt_summarize(transcribed_text: str, model_name: str, meeting_title: Optiona
 
 ## 4. 향후 행동 계획 (Action Items)
 - [할 일 내용] (담당자 / 기한)
----
-[녹취록 전문]
-{transcribed_text}
 """.strip()
 
+
+# 긴 회의의 map 단계: 구간별 녹취록을 짧은 중간 요약으로 줄인다.
+SYSTEM_PROMPT_SUMMARY_CHUNK = """
+You are a professional meeting minutes assistant. You write concise notes in Korean.
+
+제공된 녹취록은 긴 회의의 한 구간입니다. 최종 회의록 작성을 위한 중간 요약을 작성해 주세요.
+- 논의된 주제, 주요 의견(발언자를 추론할 수 있으면 포함), 결정 사항, 할 일(담당자/기한)을 빠짐없이 bullet로 정리하세요.
+- 녹취록에 없는 내용은 추가하지 마세요.
+""".strip()
+
+
+def _title_line(meeting_title: Optional[str]) -> str:
+    return f"회의 제목: {meeting_title}" if meeting_title else "회의 제목: (제공되지 않음)"
+
+
+def _summary_messages(
+    transcribed_text: str,
+    meeting_title: Optional[str],
+    source_label: str = "녹취록 전문",
+) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT_SUMMARY},
+        {"role": "user", "content": f"{_title_line(meeting_title)}\n---\n[{source_label}]\n{transcribed_text}"},
+    ]
+
+
+@with_openai_retry()
+def gpt_summarize(
+    transcribed_text: str,
+    model_name: str,
+    meeting_title: Optional[str] = None,
+    source_label: str = "녹취록 전문",
+) -> str:
+    resp = openai_client.chat.completions.create(
+        model=model_name,
+        messages=_summary_messages(transcribed_text, meeting_title, source_label),
+        temperature=0.3,
+    )
+    return resp.choices[0].message.content or ""
+
+
+@with_openai_retry()
+def gpt_summarize_chunk(chunk_text: str, model_name: str, meeting_title: Optional[str] = None) -> str:
     resp = openai_client.chat.completions.create(
         model=model_name,
         messages=[
-            {
-                "role": "system",
-                "content": "You are a professional meeting minutes assistant. You create detailed, structured reports in Korean.",
-            },
-            {"role": "user", "content": detailed_prompt},
+            {"role": "system", "content": SYSTEM_PROMPT_SUMMARY_CHUNK},
+            {"role": "user", "content": f"{_title_line(meeting_title)}\n---\n[녹취록 구간]\n{chunk_text}"},
         ],
         temperature=0.3,
     )
     return resp.choices[0].message.content or ""
+
+
+def summarize_chunks(texts: List[str], model_name: str, meeting_title: Optional[str] = None, workers: int = 4) -> str:
+    """
+    Map step for long meetings: summarize each STT chunk concurrently and join the partial summaries in order.
+    Empty chunks and consecutive duplicates (e.g. Whisper output for silent stretches) are skipped.
+    """
+    unique: List[str] = []
+    for t in texts:
+        t = t.strip()
+        if t and (not unique or unique[-1] != t):
+            unique.append(t)
+    if not unique:
+        return ""
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(unique)))) as ex:
+        partials = list(ex.map(lambda t: gpt_summarize_chunk(t, model_name, meeting_title), unique))
+    return "\n\n".join(f"[구간 {i}]\n{p.strip()}" for i, p in enumerate(partials, start=1))
+
+
+_BATCH_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+_BATCH_CUSTOM_ID = "summary"
+
+
+@with_openai_retry()
+def _upload_batch_input(request_line: dict) -> str:
+    input_file = openai_client.files.create(
+        file=("summary.jsonl", json.dumps(request_line, ensure_ascii=False).encode("utf-8")),
+        purpose="batch",
+    )
+    return input_file.id
+
+
+@with_openai_retry()
+def _create_batch(input_file_id: str):
+    return openai_client.batches.create(
+        input_file_id=input_file_id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+
+@with_openai_retry()
+def _retrieve_batch(batch_id: str):
+    return openai_client.batches.retrieve(batch_id)
+
+
+@with_openai_retry()
+def _batch_output_text(file_id: str) -> str:
+    return openai_client.files.content(file_id).text
+
+
+def submit_summary_batch(
+    transcribed_text: str,
+    model_name: str,
+    meeting_title: Optional[str] = None,
+    source_label: str = "녹취록 전문",
+) -> str:
+    """
+    Submit the summary to the OpenAI Batch API (50% cost, separate rate limit) and return the batch id.
+    The result is collected later with fetch_summary_batch, so no worker waits on the batch.
+    """
+    request_line = {
+        "custom_id": _BATCH_CUSTOM_ID,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model_name,
+            "messages": _summary_messages(transcribed_text, meeting_title, source_label),
+            "temperature": 0.3,
+        },
+    }
+    batch = _create_batch(_upload_batch_input(request_line))
+    print(f"[SUMMARY BATCH] submitted batch_id={batch.id}")
+    return batch.id
+
+
+def fetch_summary_batch(batch_id: str) -> Optional[str]:
+    """
+    Return the summary if the batch has completed, None while it is still running.
+    Raises RuntimeError if the batch ended without a usable result (failed/expired/cancelled).
+    """
+    batch = _retrieve_batch(batch_id)
+    if batch.status not in _BATCH_FINAL_STATUSES:
+        return None
+    print(f"[SUMMARY BATCH] batch_id={batch.id} status={batch.status}")
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"요약 배치가 실패했습니다. batch_id={batch.id} status={batch.status}")
+
+    output = _batch_output_text(batch.output_file_id)
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get("custom_id") != _BATCH_CUSTOM_ID:
+            continue
+        response = record.get("response") or {}
+        if response.get("status_code") != 200:
+            raise RuntimeError(f"요약 배치 요청이 실패했습니다: {record.get('error') or response}")
+        return response["body"]["choices"][0]["message"]["content"] or ""
+    raise RuntimeError(f"요약 배치 결과가 없습니다. batch_id={batch.id}")
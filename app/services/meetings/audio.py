@@ -1,8 +1,10 @@
+import math
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional
 
-import httpx
+from app.services.storage import download_to_path
 
 
 def ensure_ffmpeg():
@@ -12,40 +14,149 @@ def ensure_ffmpeg():
         raise RuntimeError("ffmpeg가 필요합니다. 서버에 ffmpeg 설치해줘요.") from e
 
 
-def split_audio(input_path: Path, out_dir: Path, seconds: int) -> List[Path]:
-    """Split audio into N-second mp3 chunks using ffmpeg."""
-    ensure_ffmpeg()
-    out_dir.mkdir(parents=True, exist_ok=True)
-    pattern = str(out_dir / "chunk_%03d.mp3")
+SEEK_MARGIN_SECONDS = 0.15
+# 이보다 짧은 마지막 구간은 따로 자르지 않고 앞 청크에 붙인다 (Whisper는 0.1초 미만 오디오를 거부함)
+MIN_TAIL_SECONDS = 1.0
+
+# Whisper는 내부적으로 16kHz mono로 처리하므로 그 형태로 바로 인코딩 (음성에는 24kbps opus로 충분)
+CHUNK_SUFFIX = ".ogg"
+CHUNK_ENCODE_ARGS = ["-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", "24k"]
+
 
+def probe_duration(input_path: Path) -> float | None:
+    """
+    Return container duration in seconds, or None if ffprobe cannot tell (e.g. MediaRecorder webm)
+    or is not installed; callers then fall back to the segment split, which needs only ffmpeg.
+    """
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        str(input_path),
+    ]
+    try:
+        proc = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        duration = float(proc.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+    return duration if duration > 0 else None
+
+
+def _extract_chunk(input_path: Path, dst_path: Path, start: float, seconds: Optional[int]) -> Path:
+    # 입력 시킹(-ss before -i)으로 바로 start 근처부터 디코딩하고,
+    # webm/opus처럼 시킹이 프레임 단위로 정확하지 않은 컨테이너를 위해 여유분만큼 출력 시킹으로 다시 맞춘다.
+    input_seek = max(start - SEEK_MARGIN_SECONDS, 0.0)
     cmd = [
         "ffmpeg",
         "-y",
+        "-nostats",
+        "-loglevel",
+        "error",
+        "-ss",
+        f"{input_seek:.3f}",
+        "-i",
+        str(input_path),
+        "-ss",
+        f"{start - input_seek:.3f}",
+        # seconds가 None이면 마지막 청크로 보고 파일 끝까지 자른다.
+        *(["-t", str(seconds)] if seconds is not None else []),
+        *CHUNK_ENCODE_ARGS,
+        str(dst_path),
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+    return dst_path
+
+
+def _iter_segment_audio(input_path: Path, out_dir: Path, seconds: int) -> Iterator[Path]:
+    """
+    Single-pass split with the segment muxer, yielding each chunk as soon as it is written.
+    ffmpeg reports finished segments on stdout (-segment_list pipe:1), so STT can start before the split ends.
+    """
+    pattern = str(out_dir / f"chunk_%03d{CHUNK_SUFFIX}")
+
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-nostats",
+        "-loglevel",
+        "error",
         "-i",
         str(input_path),
         "-f",
         "segment",
         "-segment_time",
         str(seconds),
+        "-segment_list",
+        "pipe:1",
+        "-segment_list_type",
+        "flat",
         "-reset_timestamps",
         "1",
-        "-c:a",
-        "libmp3lame",
-        "-q:a",
-        "4",
+        *CHUNK_ENCODE_ARGS,
         pattern,
     ]
-    subprocess.run(cmd, check=True, capture_output=True)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            name = line.strip()
+            if name:
+                yield out_dir / Path(name).name
+        stderr = proc.stderr.read() if proc.stderr else ""
+        if proc.wait() != 0:
+            raise RuntimeError(f"오디오 분할에 실패했습니다: {stderr.strip()}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
 
-    chunks = sorted(out_dir.glob("chunk_*.mp3"))
-    if not chunks:
+
+def iter_split_audio(input_path: Path, out_dir: Path, seconds: int, workers: int = 4) -> Iterator[Path]:
+    """
+    Split audio into N-second opus chunks, yielding chunk paths in order as each one is ready.
+    With a known duration, chunks are cut by parallel ffmpeg processes using input seeking;
+    otherwise falls back to a single streaming segment pass.
+    """
+    ensure_ffmpeg()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    produced = 0
+    duration = probe_duration(input_path)
+    if duration is None:
+        print("[AUDIO] duration unknown, falling back to segment split")
+        for chunk in _iter_segment_audio(input_path, out_dir, seconds):
+            produced += 1
+            yield chunk
+    else:
+        starts = [float(s) for s in range(0, math.ceil(duration), seconds)]
+        if len(starts) > 1 and duration - starts[-1] < MIN_TAIL_SECONDS:
+            starts.pop()
+        last = len(starts) - 1
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(starts)))) as ex:
+            for chunk in ex.map(
+                lambda i: _extract_chunk(
+                    input_path,
+                    out_dir / f"chunk_{i:03d}{CHUNK_SUFFIX}",
+                    starts[i],
+                    seconds if i < last else None,
+                ),
+                range(len(starts)),
+            ):
+                produced += 1
+                yield chunk
+
+    if not produced:
         raise RuntimeError("오디오 분할 결과가 없습니다.")
-    return chunks
+
+
+def split_audio(input_path: Path, out_dir: Path, seconds: int, workers: int = 4) -> List[Path]:
+    """Split audio into N-second opus chunks using ffmpeg."""
+    return list(iter_split_audio(input_path, out_dir, seconds, workers))
 
 
 def download_audio(download_url: str, dst_path: Path):
-    dst_path.parent.mkdir(parents=True, exist_ok=True)
-    with httpx.Client(timeout=300) as http:
-        r = http.get(download_url)
-        r.raise_for_status()
-        dst_path.write_bytes(r.content)
+    download_to_path(download_url, dst_path)
@@ -0,0 +1,45 @@
+import random
+import time
+from functools import wraps
+
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+# 429, 네트워크 끊김/타임아웃, 5xx는 잠시 후 재시도하면 대부분 성공한다.
+RETRYABLE_OPENAI_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def with_openai_retry(max_attempts: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+    """
+    Retry an OpenAI call with exponential backoff + jitter on rate limits and transient failures.
+    Honors the Retry-After header when present. Raises the last error if all attempts fail.
+    This is the only retry layer: OpenAI clients are created with max_retries=0.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    return fn(*args, **kwargs)
+                except RETRYABLE_OPENAI_ERRORS as e:
+                    if attempt == max_attempts:
+                        raise
+                    delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, base_delay)
+                    retry_after = _retry_after_seconds(e)
+                    if retry_after is not None:
+                        delay = max(delay, retry_after)
+                    delay = min(delay, max_delay)
+                    print(f"[OPENAI] {fn.__name__} attempt={attempt} failed ({type(e).__name__}), retry in {delay:.1f}s")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
@@ -3,11 +3,10 @@ import subprocess
 from pathlib import Path
 from typing import List
 
-import httpx
 from docx import Document
 from pypdf import PdfReader
 
-from app.services.storage import presign_get_url
+from app.services.storage import download_to_path, presign_get_url
 
 
 _chapter_re = re.compile(r"^제\s*\d+\s*장\b\s*(.*)")
@@ -16,12 +15,7 @@ _article_re = re.compile(r"^제\s*\d+\s*조\b.*")
 
 def download_object(object_key: str, dst_path: Path):
     """Download an S3 object (via presigned GET) to a local path."""
-    url = presign_get_url(object_key)
-    dst_path.parent.mkdir(parents=True, exist_ok=True)
-    with httpx.Client(timeout=300) as http:
-        r = http.get(url)
-        r.raise_for_status()
-        dst_path.write_bytes(r.content)
+    download_to_path(presign_get_url(object_key), dst_path)
 
 
 def extract_text(file_path: Path, content_type: str | None = None) -> str:
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from typing import List
 
@@ -5,32 +6,64 @@ import numpy as np
 from openai import OpenAI
 
 from app.core.config import settings
+from app.services.openai_retry import with_openai_retry
 
 
 @lru_cache(maxsize=1)
 def get_openai_client() -> OpenAI:
-    return OpenAI(api_key=settings.OPENAI_API_KEY)
+    # 재시도는 with_openai_retry가 담당하므로 SDK 기본 재시도(2회)는 끈다.
+    return OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
 
 
 def _normalize_embeddings(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place (zero vectors are left as-is)."""
     norms = np.linalg.norm(vectors, axis=1, keepdims=True)
-    norms = np.where(norms == 0, 1.0, norms)
-    return vectors / norms
+    np.divide(vectors, norms, out=vectors, where=norms != 0)
+    return vectors
+
+
+def _split_batches(chunks: List[str], max_chars: int, max_items: int) -> List[List[str]]:
+    """Group chunks into request-sized batches bounded by total chars and item count."""
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_chars = 0
+    for chunk in chunks:
+        if current and (current_chars + len(chunk) > max_chars or len(current) >= max_items):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(chunk)
+        current_chars += len(chunk)
+    if current:
+        batches.append(current)
+    return batches
+
+
+@with_openai_retry()
+def _embed_batch(batch: List[str]) -> List[List[float]]:
+    response = get_openai_client().embeddings.create(model=settings.EMBED_MODEL, input=batch)
+    if len(response.data) != len(batch):
+        raise RuntimeError(
+            f"OpenAI embedding count mismatch: expected {len(batch)}, got {len(response.data)}"
+        )
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
 
 
 def embed_chunks(chunks: List[str]):
     """Run embeddings; return numpy array for optional downstream storage."""
     if not chunks:
-        return np.array([], dtype=float)
+        return np.array([], dtype=np.float32)
     if not settings.OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY가 설정되지 않았습니다.")
 
-    client = get_openai_client()
-    response = client.embeddings.create(model=settings.EMBED_MODEL, input=chunks)
-    vectors = [item.embedding for item in response.data]
-    if len(vectors) != len(chunks):
-        raise RuntimeError(
-            f"OpenAI embedding count mismatch: expected {len(chunks)}, got {len(vectors)}"
-        )
-    embeddings = np.array(vectors, dtype=float)
+    batches = _split_batches(chunks, settings.EMBED_BATCH_CHARS, settings.EMBED_BATCH_SIZE)
+    if len(batches) == 1:
+        results = [_embed_batch(batches[0])]
+    else:
+        workers = max(1, min(settings.EMBED_CONCURRENCY, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_embed_batch, batches))
+
+    vectors = [vec for batch_vectors in results for vec in batch_vectors]
+    # OpenAI 임베딩은 fp32 정밀도이므로 float64로 키우지 않는다.
+    embeddings = np.asarray(vectors, dtype=np.float32)
     return _normalize_embeddings(embeddings)
@@ -1,113 +1,399 @@
-from functools import lru_cache
-from typing import List, Optional
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 
+import numpy as np
 import weaviate
 from weaviate.classes.config import Configure, DataType, Property
+from weaviate.classes.data import DataObject
 from weaviate.classes.query import Filter
-from weaviate.connect import ConnectionParams
+from weaviate.classes.init import AdditionalConfig, GrpcConfig, Timeout
+from weaviate.connect import ConnectionParams, ProtocolParams
+from weaviate.exceptions import UnexpectedStatusCodeError, WeaviateDeleteManyError
 
 from app.core.config import settings
 from app.services.provdocuments.embeddings import embed_chunks
 
 
+logger = logging.getLogger(__name__)
+
 COLLECTION_NAME = settings.WEAVIATE_COLLECTION
 
+# 컬렉션 속성 이름. 스키마/저장/필터/조회가 같은 상수(같은 str 객체)를 쓰도록 한 곳에서 정의한다.
+_K_COM = "comId"
+_K_PROV = "provNo"
+_K_OBJ = "objectKey"
+_K_NAME = "originalName"
+_K_IDX = "chunkIndex"
+_K_CONTENT = "content"
+_K_PUBLIC = "isPublic"
 
-@lru_cache(maxsize=1)
-def get_client() -> weaviate.WeaviateClient:
+_INSERT_RETRY_DELAY = 1.0  # 부분 실패한 청크 재시도 전 대기(초)
+
+_insert_pool = ThreadPoolExecutor(max_workers=settings.WEAVIATE_INSERT_WORKERS, thread_name_prefix="weaviate-insert")
+
+
+def _connection_config():
     if not settings.WEAVIATE_HTTP_URL:
         raise RuntimeError("WEAVIATE_HTTP_URL이 설정되지 않았습니다.")
-    params = ConnectionParams.from_url(
-        settings.WEAVIATE_HTTP_URL,
-        grpc_port=settings.WEAVIATE_GRPC_PORT,
+    url = urlparse(settings.WEAVIATE_HTTP_URL)
+    secure = url.scheme == "https"
+    host = url.hostname or "localhost"
+    # HTTP/gRPC를 명시적으로 구성해 insert_many/질의가 항상 gRPC 경로를 타도록 한다.
+    params = ConnectionParams(
+        http=ProtocolParams(host=host, port=url.port or (443 if secure else 80), secure=secure),
+        grpc=ProtocolParams(host=host, port=settings.WEAVIATE_GRPC_PORT, secure=secure),
     )
-    client = weaviate.WeaviateClient(connection_params=params)
+    config = AdditionalConfig(
+        timeout=Timeout(init=30, query=60, insert=120),
+        # 장시간 유지되는 단일 gRPC 채널이 유휴 구간 뒤에도 끊기지 않도록 keepalive 설정
+        grpc_config=GrpcConfig(
+            channel_options=[
+                ("grpc.keepalive_time_ms", 30_000),
+                ("grpc.keepalive_timeout_ms", 10_000),
+            ]
+        ),
+    )
+    return params, config
+
+
+# 클라이언트/컬렉션 핸들/스키마 확인은 프로세스당 한 번만 하도록 같은 잠금 아래에서 초기화한다.
+# (lru_cache는 동시에 들어온 첫 호출들을 기다리게 하지 않아 연결이 여러 개 생기고 새어 나간다)
+_init_lock = threading.RLock()
+_client: Optional[weaviate.WeaviateClient] = None
+_collection = None
+_collection_ensured = False
+
+
+def _connect() -> weaviate.WeaviateClient:
+    params, config = _connection_config()
+    client = weaviate.WeaviateClient(connection_params=params, additional_config=config)
+    # connect()는 초기화 검사에서 gRPC health check도 수행하므로, gRPC가 안 되면 여기서 실패한다.
     client.connect()
+    if not client.is_live():
+        client.close()
+        raise RuntimeError("Weaviate 서버에 연결할 수 없습니다.")
+    atexit.register(client.close)
     return client
 
 
+def get_client() -> weaviate.WeaviateClient:
+    global _client
+    if _client is None:
+        with _init_lock:
+            if _client is None:
+                _client = _connect()
+    return _client
+
+
+_async_client: Optional[weaviate.WeaviateAsyncClient] = None
+_async_lock = asyncio.Lock()
+
+
+async def get_async_client() -> weaviate.WeaviateAsyncClient:
+    """Async client with the same connection settings, connected on first use (on the running loop)."""
+    global _async_client
+    if _async_client is not None and _async_client.is_connected():
+        return _async_client
+    async with _async_lock:
+        if _async_client is None:
+            params, config = _connection_config()
+            _async_client = weaviate.WeaviateAsyncClient(connection_params=params, additional_config=config)
+        if not _async_client.is_connected():
+            await _async_client.connect()
+    return _async_client
+
+
+async def close_async_client():
+    if _async_client is not None:
+        await _async_client.close()
+
+
+_QUANTIZERS = {
+    "sq": Configure.VectorIndex.Quantizer.sq,
+    "bq": Configure.VectorIndex.Quantizer.bq,
+    "pq": Configure.VectorIndex.Quantizer.pq,
+}
+
+
+def _vector_index_config():
+    # 클라이언트는 gRPC로 항상 fp32를 보내므로, 벡터 용량/대역폭 절감은 서버 측 양자화로 한다.
+    # 이미 존재하는 컬렉션에는 적용되지 않는다 (생성 시점에만 사용).
+    name = (settings.WEAVIATE_VECTOR_QUANTIZER or "").strip().lower()
+    if not name:
+        return None
+    if name not in _QUANTIZERS:
+        raise ValueError(f"unsupported WEAVIATE_VECTOR_QUANTIZER={settings.WEAVIATE_VECTOR_QUANTIZER!r} (sq|bq|pq)")
+    return Configure.VectorIndex.hnsw(quantizer=_QUANTIZERS[name]())
+
+
 def ensure_collection(client: weaviate.WeaviateClient):
-    existing = client.collections.list_all()
-    if COLLECTION_NAME in existing:
+    global _collection_ensured
+    if _collection_ensured:
         return
-    client.collections.create(
-        name=COLLECTION_NAME,
-        vectorizer_config=Configure.Vectorizer.none(),
-        properties=[
-            Property(name="comId", data_type=DataType.TEXT),
-            Property(name="provNo", data_type=DataType.INT),
-            Property(name="objectKey", data_type=DataType.TEXT),
-            Property(name="originalName", data_type=DataType.TEXT),
-            Property(name="chunkIndex", data_type=DataType.INT),
-            Property(name="content", data_type=DataType.TEXT),
-            Property(name="isPublic", data_type=DataType.BOOL),
-        ],
+    # 여러 스레드가 동시에 처음 호출해도 서버 확인/생성은 한 번만 하도록 잠근다.
+    with _init_lock:
+        if _collection_ensured:
+            return
+        # list_all()은 클러스터 전체 스키마를 받아오므로, 이름 하나만 확인하는 exists()를 쓴다.
+        if not client.collections.exists(COLLECTION_NAME):
+            try:
+                client.collections.create(
+                    name=COLLECTION_NAME,
+                    vectorizer_config=Configure.Vectorizer.none(),
+                    vector_index_config=_vector_index_config(),
+                    properties=[
+                        Property(name=_K_COM, data_type=DataType.TEXT),
+                        Property(name=_K_PROV, data_type=DataType.INT),
+                        Property(name=_K_OBJ, data_type=DataType.TEXT),
+                        Property(name=_K_NAME, data_type=DataType.TEXT),
+                        Property(name=_K_IDX, data_type=DataType.INT),
+                        Property(name=_K_CONTENT, data_type=DataType.TEXT),
+                        Property(name=_K_PUBLIC, data_type=DataType.BOOL),
+                    ],
+                )
+            except UnexpectedStatusCodeError:
+                # 다른 프로세스(uvicorn worker 등)가 먼저 만든 경우는 정상으로 본다.
+                if not client.collections.exists(COLLECTION_NAME):
+                    raise
+        _collection_ensured = True
+
+
+def get_collection():
+    """Collection handle for COLLECTION_NAME, created on first use and reused for the process lifetime."""
+    global _collection
+    if _collection is None:
+        with _init_lock:
+            if _collection is None:
+                client = get_client()
+                ensure_collection(client)
+                _collection = client.collections.get(COLLECTION_NAME)
+    return _collection
+
+
+async def warmup():
+    """Connect and ensure the collection at app startup so the first request skips the handshake."""
+    try:
+        # 연결/스키마 확인은 blocking이므로 이벤트 루프 밖에서 실행한다.
+        await asyncio.to_thread(get_collection)
+    except Exception as e:
+        # Weaviate가 아직 안 떠 있어도 앱은 기동하고, 첫 요청에서 다시 연결을 시도한다.
+        logger.warning("weaviate.warmup failed: %s", e)
+
+
+def _batch_objects(base: dict, offset: int, batch: List[Tuple[str, Any]]) -> List[DataObject]:
+    # 배치의 벡터를 2-D float32 행렬로 모은 뒤 한 번에 list로 바꾼다.
+    # (클라이언트가 ndarray 행마다 tolist()를 호출하는 대신 C 레벨 변환 1회로 끝낸다)
+    matrix = np.ascontiguousarray([vec for _, vec in batch], dtype=np.float32)
+    if matrix.ndim != 2:
+        raise ValueError(f"each embedding must be a 1-D vector, got batch shape={matrix.shape}")
+    return [
+        DataObject(properties={**base, _K_IDX: offset + i, _K_CONTENT: chunk}, vector=vec)
+        for i, ((chunk, _), vec) in enumerate(zip(batch, matrix.tolist()))
+    ]
+
+
+def _base_properties(com_id: str, prov_no: int, object_key: str, original_name: str, is_public: Optional[bool]) -> dict:
+    # 문서 단위로 동일한 메타데이터는 한 번만 만들고, 청크마다 달라지는 키만 덧붙인다.
+    return {
+        _K_COM: com_id,
+        _K_PROV: prov_no,
+        _K_OBJ: object_key,
+        _K_NAME: original_name,
+        _K_PUBLIC: bool(is_public) if is_public is not None else False,
+    }
+
+
+def _chunk_pairs(chunks: Optional[List[str]], embeddings, chunks_iter) -> Iterable[Tuple[str, Any]]:
+    if chunks_iter is not None:
+        return chunks_iter
+    if not chunks:
+        return ()
+    matrix = np.asarray(embeddings)
+    if matrix.ndim != 2 or len(matrix) != len(chunks):
+        raise ValueError(f"embeddings must be a 2-D array with one row per chunk, got shape={matrix.shape}")
+    return zip(chunks, matrix)
+
+
+def _iter_batches(pairs: Iterable[Tuple[str, Any]], batch_size: int) -> Iterator[Tuple[int, List[Tuple[str, Any]]]]:
+    """Yield (offset, batch) as soon as each batch fills, without reading the input ahead."""
+    batch: List[Tuple[str, Any]] = []
+    offset = 0
+    for pair in pairs:
+        batch.append(pair)
+        if len(batch) >= batch_size:
+            yield offset, batch
+            offset += len(batch)
+            batch = []
+    if batch:
+        yield offset, batch
+
+
+def _failed_objects(objects: List[DataObject], result) -> List[DataObject]:
+    # result.errors의 키는 이번에 보낸 objects 리스트 기준 인덱스다.
+    return [objects[i] for i in sorted(result.errors)]
+
+
+def _log_insert_failures(objects: List[DataObject], result):
+    failed_idx = [obj.properties[_K_IDX] for obj in _failed_objects(objects, result)]
+    first = next(iter(result.errors.values()))
+    logger.warning(
+        "weaviate.insert gave up on %d chunks (chunkIndex=%s): %s", len(failed_idx), failed_idx[:10], first.message
     )
 
 
+def _log_insert_retry(objects: List[DataObject], result):
+    first = next(iter(result.errors.values()))
+    logger.warning(
+        "weaviate.insert failed=%d/%d, retrying failed chunks: %s", len(result.errors), len(objects), first.message
+    )
+
+
+def _insert_batch(coll, objects: List[DataObject]) -> int:
+    """insert_many one batch; chunks that failed are retried once. Returns the stored count."""
+    result = coll.data.insert_many(objects)
+    if not result.has_errors:
+        return len(objects)
+    _log_insert_retry(objects, result)
+    failed = _failed_objects(objects, result)
+    time.sleep(_INSERT_RETRY_DELAY)
+    retry = coll.data.insert_many(failed)
+    if retry.has_errors:
+        _log_insert_failures(failed, retry)
+    return len(objects) - len(retry.errors)
+
+
+async def _ainsert_batch(coll, objects: List[DataObject]) -> int:
+    result = await coll.data.insert_many(objects)
+    if not result.has_errors:
+        return len(objects)
+    _log_insert_retry(objects, result)
+    failed = _failed_objects(objects, result)
+    await asyncio.sleep(_INSERT_RETRY_DELAY)
+    retry = await coll.data.insert_many(failed)
+    if retry.has_errors:
+        _log_insert_failures(failed, retry)
+    return len(objects) - len(retry.errors)
+
+
 def store_prov_chunks(
     com_id: str,
     prov_no: int,
     object_key: str,
     original_name: str,
     is_public: Optional[bool],
-    chunks: List[str],
-    embeddings,
-):
+    chunks: Optional[List[str]] = None,
+    embeddings=None,
+    batch_size: int = 200,
+    chunks_iter: Optional[Iterable[Tuple[str, np.ndarray]]] = None,
+) -> int:
     """
-    Store each chunk embedding in Weaviate with company/prov metadata.
+    Store each chunk embedding in Weaviate with company/prov metadata. Returns the stored count.
+    Pass either chunks + embeddings (one row per chunk) or chunks_iter yielding (chunk, vector) pairs.
+    Objects are flushed with insert_many every batch_size items, so with chunks_iter peak memory
+    is bounded by the in-flight batches rather than the whole document.
+    Chunks rejected by the server are retried once; chunks that still fail are logged and not counted.
     """
-    client = get_client()
-    ensure_collection(client)
+    pairs = _chunk_pairs(chunks, embeddings, chunks_iter)
+    coll = get_collection()
+    base = _base_properties(com_id, prov_no, object_key, original_name, is_public)
+
+    # 배치를 여러 스레드에서 동시에 insert_many로 보낸다 (연결된 v4 클라이언트는 데이터 작업에 thread-safe).
+    # 아직 전송되지 않은 배치 수를 제한해 입력을 끝까지 미리 읽어 메모리에 쌓지 않도록 한다.
+    inflight = threading.BoundedSemaphore(settings.WEAVIATE_INSERT_WORKERS * 2)
+    futures: List[Future] = []
+    for offset, batch in _iter_batches(pairs, batch_size):
+        objects = _batch_objects(base, offset, batch)
+        inflight.acquire()
+        future = _insert_pool.submit(_insert_batch, coll, objects)
+        future.add_done_callback(lambda _: inflight.release())
+        futures.append(future)
+
+    return sum(future.result() for future in futures)
+
+
+async def astore_prov_chunks(
+    com_id: str,
+    prov_no: int,
+    object_key: str,
+    original_name: str,
+    is_public: Optional[bool],
+    chunks: Optional[List[str]] = None,
+    embeddings=None,
+    batch_size: int = 200,
+    chunks_iter: Optional[Iterable[Tuple[str, np.ndarray]]] = None,
+) -> int:
+    """
+    Async counterpart of store_prov_chunks for callers running on the event loop. Returns the stored count.
+    Batches are awaited concurrently (up to WEAVIATE_INSERT_WORKERS) on the async gRPC client;
+    if one batch raises, the remaining inserts are cancelled and that error is raised.
+    """
+    pairs = _chunk_pairs(chunks, embeddings, chunks_iter)
+    if not _collection_ensured:
+        # 스키마 생성은 한 곳(sync ensure_collection)에서만 하고, 첫 호출 한 번만 스레드로 넘긴다.
+        await asyncio.to_thread(get_collection)
+    client = await get_async_client()
     coll = client.collections.get(COLLECTION_NAME)
+    base = _base_properties(com_id, prov_no, object_key, original_name, is_public)
 
-    for idx, (chunk, vec) in enumerate(zip(chunks, embeddings)):
-        coll.data.insert(
-            properties={
-                "comId": com_id,
-                "provNo": prov_no,
-                "objectKey": object_key,
-                "originalName": original_name,
-                "chunkIndex": idx,
-                "content": chunk,
-                "isPublic": bool(is_public) if is_public is not None else False,
-            },
-            vector=vec.tolist(),
-        )
+    inflight = asyncio.Semaphore(settings.WEAVIATE_INSERT_WORKERS)
+    stored = 0
+
+    async def _insert(objects: List[DataObject]):
+        nonlocal stored
+        try:
+            stored += await _ainsert_batch(coll, objects)
+        finally:
+            inflight.release()
+
+    # TaskGroup은 하나가 실패하면 나머지 insert를 취소하고 모두 끝난 뒤에 빠져나온다 (실행 중인 task가 남지 않음).
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for offset, batch in _iter_batches(pairs, batch_size):
+                objects = _batch_objects(base, offset, batch)
+                await inflight.acquire()
+                tg.create_task(_insert(objects))
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0]
+    return stored
+
+
+def _prov_filter(com_id: str, prov_no: int):
+    # & 로 묶으면 all_of([...]) 리스트 래퍼 없이 AND 노드 하나로 직렬화된다.
+    return Filter.by_property(_K_COM).equal(com_id) & Filter.by_property(_K_PROV).equal(prov_no)
 
 
 def delete_prov_chunks(com_id: str, prov_no: int) -> int:
     """
-    Delete all chunks for a company/provNo. Returns deleted count (best-effort).
+    Delete all chunks for a company/provNo. Returns deleted count.
+    The collection is not ensured here: if it was never created there is nothing to delete.
     """
     client = get_client()
-    ensure_collection(client)
     coll = client.collections.get(COLLECTION_NAME)
-    where = Filter.all_of([
-        Filter.by_property("comId").equal(com_id),
-        Filter.by_property("provNo").equal(prov_no),
-    ])
-    res = coll.data.delete_many(where=where)
+    where = _prov_filter(com_id, prov_no)
     try:
-        deleted = res.results["successful"]  # type: ignore[dict-item]
-        print(f"[WEAVIATE] delete comId={com_id} provNo={prov_no} deleted={deleted}")
-        return deleted
-    except Exception as e:
-        print(f"[WEAVIATE] delete result parse failed: {e} raw={res}")
-        return 0
+        res = coll.data.delete_many(where=where)
+    except WeaviateDeleteManyError:
+        # 컬렉션이 없어서 실패한 경우에만 no-op으로 처리 (확인은 실패 경로에서만 한다)
+        if not client.collections.exists(COLLECTION_NAME):
+            return 0
+        raise
+    deleted = res.successful
+    logger.info("weaviate.delete com_id=%s prov_no=%s deleted=%d", com_id, prov_no, deleted)
+    return deleted
 
 
 def update_prov_chunks_public(com_id: str, prov_no: int, is_public: bool, batch_size: int = 200) -> int:
     """
     Update isPublic metadata for all chunks matching com_id + prov_no.
     """
-    client = get_client()
-    ensure_collection(client)
-    coll = client.collections.get(COLLECTION_NAME)
-    where = Filter.all_of([
-        Filter.by_property("comId").equal(com_id),
-        Filter.by_property("provNo").equal(prov_no),
-    ])
+    coll = get_collection()
+    where = _prov_filter(com_id, prov_no)
 
     updated = 0
     offset = 0
@@ -116,7 +402,7 @@ def update_prov_chunks_public(com_id: str, prov_no: int, is_public: bool, batch_
             filters=where,
             limit=batch_size,
             offset=offset,
-            return_properties=["isPublic"],
+            return_properties=[_K_PUBLIC],
         )
         objs = getattr(res, "objects", None) or []
         if not objs:
@@ -126,13 +412,15 @@ def update_prov_chunks_public(com_id: str, prov_no: int, is_public: bool, batch_
             if not obj_id:
                 continue
             try:
-                coll.data.update(uuid=obj_id, properties={"isPublic": bool(is_public)})
+                coll.data.update(uuid=obj_id, properties={_K_PUBLIC: bool(is_public)})
                 updated += 1
             except Exception as e:
-                print(f"[WEAVIATE] update failed for {obj_id}: {e}")
+                logger.warning("weaviate.update failed uuid=%s: %s", obj_id, e)
         offset += len(objs)
 
-    print(f"[WEAVIATE] update comId={com_id} provNo={prov_no} isPublic={is_public} updated={updated}")
+    logger.info(
+        "weaviate.update com_id=%s prov_no=%s is_public=%s updated=%d", com_id, prov_no, is_public, updated
+    )
     return updated
 
 
@@ -145,42 +433,40 @@ def search_prov_chunks(
     """
     Vector search over 규약 청크. Returns top chunks' content text.
     """
-    client = get_client()
-    ensure_collection(client)
-    coll = client.collections.get(COLLECTION_NAME)
+    coll = get_collection()
 
     query_vec = embed_chunks([query])[0].tolist()
 
     where_filters = []
     if com_id:
-        where_filters.append(Filter.by_property("comId").equal(com_id))
+        where_filters.append(Filter.by_property(_K_COM).equal(com_id))
     if prov_no is not None:
-        where_filters.append(Filter.by_property("provNo").equal(prov_no))
-    where_filters.append(Filter.by_property("isPublic").equal(True))
+        where_filters.append(Filter.by_property(_K_PROV).equal(prov_no))
+    where_filters.append(Filter.by_property(_K_PUBLIC).equal(True))
     where = Filter.all_of(where_filters) if where_filters else None
 
     res = coll.query.near_vector(
         near_vector=query_vec,
         filters=where,
         limit=top_k,
-        return_properties=["content", "originalName", "chunkIndex", "comId", "provNo"],
+        return_properties=[_K_CONTENT, _K_NAME, _K_IDX, _K_COM, _K_PROV],
     )
 
     snippets: List[str] = []
     try:
         for obj in res.objects:  # type: ignore[attr-defined]
             props = obj.properties or {}
-            content = props.get("content")
+            content = props.get(_K_CONTENT)
             if not content:
                 continue
-            origin = props.get("originalName") or props.get("comId")
-            idx = props.get("chunkIndex")
+            origin = props.get(_K_NAME) or props.get(_K_COM)
+            idx = props.get(_K_IDX)
             prefix_parts = [p for p in [origin, f"chunk#{idx}" if idx is not None else None] if p]
             prefix = " ".join(prefix_parts)
             snippet = f"{prefix} {content}".strip() if prefix else content
             snippets.append(snippet)
     except Exception as e:
-        print(f"[WEAVIATE] search parse failed: {e} raw={res}")
+        logger.warning("weaviate.search parse failed: %s", e)
         return []
 
     return snippets
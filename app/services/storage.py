@@ -1,4 +1,6 @@
-from app.clients import s3_client
+from pathlib import Path
+
+from app.clients import http_client, s3_client
 from app.core.config import settings
 
 
@@ -8,3 +10,13 @@ def presign_get_url(object_key: str) -> str:
         Params={"Bucket": settings.AWS_BUCKET, "Key": object_key},
         ExpiresIn=settings.PRESIGN_EXPIRE,
     )
+
+
+def download_to_path(url: str, dst_path: Path, timeout: float = 300, chunk_size: int = 1 << 20):
+    """Stream a URL to disk in 1 MB blocks so memory stays flat regardless of file size."""
+    dst_path.parent.mkdir(parents=True, exist_ok=True)
+    with http_client.stream("GET", url, timeout=timeout) as r:
+        r.raise_for_status()
+        with dst_path.open("wb") as f:
+            for block in r.iter_bytes(chunk_size=chunk_size):
+                f.write(block)
@@ -1,12 +1,29 @@
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from app.core.config import settings
 from app.schemas import RunRequest
-from app.services.meetings.ai import gpt_summarize, whisper_transcribe
-from app.services.meetings.audio import download_audio, split_audio
+from app.services.meetings.ai import gpt_summarize, submit_summary_batch, summarize_chunks, whisper_transcribe
+from app.services.meetings.audio import download_audio, iter_split_audio
 from app.services.callbacks import callback_to_spring, format_callback_url
 from app.services.storage import presign_get_url
+from app.workers.summary_batches import register_summary_batch
+
+
+def send_failed_callback(req: RunRequest, error_message: str):
+    payload = {
+        "meetNo": req.meetNo,
+        "objectKey": req.objectKey,
+        "status": "FAILED",
+        "sttText": None,
+        "aiText": None,
+        "errorMessage": error_message,
+    }
+    try:
+        callback_to_spring(format_callback_url(req.callbackUrl, req.meetNo), req.callbackKey, payload)
+    except Exception:
+        pass
 
 
 def process_job(req: RunRequest):
@@ -32,44 +49,47 @@ def process_job(req: RunRequest):
             download_audio(download_url, audio_path)
             print("STEP1 DONE bytes=", audio_path.stat().st_size)
 
-            print("STEP2: splitting...")
-            chunks = split_audio(audio_path, chunks_dir, split_seconds)
-            print("STEP2 DONE chunks=", len(chunks))
-
-            print("STEP3: whisper...")
-            texts = []
-            for chunk in chunks:
-                t = whisper_transcribe(chunk, stt_model)
-                texts.append(t)
+            print("STEP2+3: splitting + whisper...")
+            # 청크가 하나 준비될 때마다 바로 Whisper에 제출해 분할과 STT를 겹쳐 실행 (인덱스 순서 유지)
+            with ThreadPoolExecutor(max_workers=max(1, settings.STT_CONCURRENCY)) as ex:
+                futures = [
+                    ex.submit(whisper_transcribe, chunk, stt_model)
+                    for chunk in iter_split_audio(audio_path, chunks_dir, split_seconds, settings.SPLIT_CONCURRENCY)
+                ]
+                texts = [f.result() for f in futures]
+            print("STEP2 DONE chunks=", len(texts))
 
             transcribed_text = "\n\n".join(texts).strip()
             print("STEP3 DONE stt_len=", len(transcribed_text))
 
-            print("STEP4: gpt summarize...")
-            summary = gpt_summarize(transcribed_text, sum_model, meeting_title)
-            print("STEP4 DONE ai_len=", len(summary))
+            print(f"STEP4: gpt summarize... batch={req.batch}")
+            summary_input, source_label = transcribed_text, "녹취록 전문"
+            if len(transcribed_text) > settings.SUMMARIZE_MAP_THRESHOLD:
+                # 긴 회의는 구간별 중간 요약(map) 후 최종 회의록(reduce)으로 나눠 컨텍스트 한도와 지연을 줄인다.
+                summary_input = summarize_chunks(texts, sum_model, meeting_title, settings.SUMMARY_CONCURRENCY)
+                source_label = "구간별 중간 요약"
+                print("STEP4 map DONE partial_len=", len(summary_input))
 
             payload = {
                 "meetNo": meet_no,
                 "objectKey": object_key,
                 "status": "DONE",
                 "sttText": transcribed_text,
-                "aiText": summary,
+                "aiText": None,
                 "errorMessage": None,
             }
+            if req.batch:
+                # 배치 결과는 메인 프로세스의 poller가 받아 콜백한다 (worker와 임시 파일은 바로 반납).
+                batch_id = submit_summary_batch(summary_input, sum_model, meeting_title, source_label)
+                register_summary_batch(batch_id, cb_url, req.callbackKey, payload)
+                print("STEP4 batch submitted batch_id=", batch_id)
+                return
+
+            summary = gpt_summarize(summary_input, sum_model, meeting_title, source_label)
+            print("STEP4 DONE ai_len=", len(summary))
+            payload["aiText"] = summary
             callback_to_spring(cb_url, req.callbackKey, payload)
 
     except Exception as e:
         print("=== JOB FAIL ===", repr(e))
-        payload = {
-            "meetNo": meet_no,
-            "objectKey": object_key,
-            "status": "FAILED",
-            "sttText": None,
-            "aiText": None,
-            "errorMessage": str(e),
-        }
-        try:
-            callback_to_spring(cb_url, req.callbackKey, payload)
-        except Exception:
-            pass
+        send_failed_callback(req, str(e))
@@ -72,7 +72,7 @@ def process_prov_embedding(req: ProvEmbeddingRequest):
 
             # ✅ 회사별 메타를 포함해 벡터 DB 저장
             try:
-                store_prov_chunks(
+                stored = store_prov_chunks(
                     com_id=req.comId,
                     prov_no=prov_no,
                     object_key=req.objectKey,
@@ -81,16 +81,19 @@ def process_prov_embedding(req: ProvEmbeddingRequest):
                     chunks=chunks,
                     embeddings=embs,
                 )
-                print(f"[PROV] weaviate stored chunks={len(chunks)} collection={settings.WEAVIATE_COLLECTION}")
+                print(f"[PROV] weaviate stored chunks={stored}/{len(chunks)} collection={settings.WEAVIATE_COLLECTION}")
             except Exception as e:
                 print(f"[PROV] weaviate store failed: {e}")
                 raise
+            if chunks and not stored:
+                raise RuntimeError("Weaviate에 저장된 청크가 없습니다.")
 
         payload = {
             "provNo": prov_no,
             "success": True,
-            "chunkCnt": len(chunks),
-            "errorMsg": None,
+            "chunkCnt": stored,
+            # 일부 청크만 저장된 경우 누락 개수를 함께 알린다.
+            "errorMsg": f"{len(chunks) - stored}개 청크 저장 실패" if stored < len(chunks) else None,
         }
         try:
             key_preview = (callback_key[:3] + "***") if callback_key else "(none)"
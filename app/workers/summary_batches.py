@@ -0,0 +1,142 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+from app.clients import s3_client
+from app.core.config import settings
+from app.services.callbacks import callback_to_spring
+from app.services.meetings.ai import fetch_summary_batch
+from app.services.openai_retry import RETRYABLE_OPENAI_ERRORS
+
+# 배치 완료까지 최대 24시간 걸리므로, 대기 기록은 pod 재시작/재배포에도 남도록 S3에 둔다.
+#   {prefix}pending/{batch_id}.json : 콜백 대상과 DONE payload
+#   {prefix}claims/{batch_id}       : 콜백 전송 중 표시 (여러 pod가 같은 배치를 중복 전송하지 않도록)
+
+
+def _pending_key(batch_id: str) -> str:
+    return f"{settings.SUMMARY_BATCH_S3_PREFIX}pending/{batch_id}.json"
+
+
+def _claim_key(batch_id: str) -> str:
+    return f"{settings.SUMMARY_BATCH_S3_PREFIX}claims/{batch_id}"
+
+
+def register_summary_batch(batch_id: str, callback_url: str, callback_key: str, payload: dict):
+    """
+    Record a submitted summary batch so the poller can send the callback when it finishes.
+    payload is the DONE callback body without aiText; it is filled in (or turned into FAILED) later.
+    Stored in S3 so it works from the job process pool and survives pod restarts within the batch window.
+    """
+    record = {
+        "batchId": batch_id,
+        "callbackUrl": callback_url,
+        "callbackKey": callback_key,
+        "payload": payload,
+    }
+    s3_client.put_object(
+        Bucket=settings.AWS_BUCKET,
+        Key=_pending_key(batch_id),
+        Body=json.dumps(record, ensure_ascii=False).encode("utf-8"),
+        ContentType="application/json",
+    )
+
+
+def _claim(batch_id: str) -> bool:
+    key = _claim_key(batch_id)
+    try:
+        # If-None-Match: * 로 claim 객체가 없을 때만 생성 → 먼저 만든 쪽만 콜백을 보낸다.
+        s3_client.put_object(Bucket=settings.AWS_BUCKET, Key=key, Body=b"", IfNoneMatch="*")
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("PreconditionFailed", "ConditionalRequestConflict"):
+            raise
+    try:
+        head = s3_client.head_object(Bucket=settings.AWS_BUCKET, Key=key)
+    except ClientError:
+        return False
+    age = (datetime.now(timezone.utc) - head["LastModified"]).total_seconds()
+    if age > settings.SUMMARY_BATCH_CLAIM_STALE_SECONDS:
+        # 콜백 도중 프로세스가 죽어 남은 claim은 풀어 두고 다음 주기에 다시 처리한다.
+        print(f"[SUMMARY BATCH] releasing stale claim batch_id={batch_id} age={age:.0f}s")
+        s3_client.delete_object(Bucket=settings.AWS_BUCKET, Key=key)
+    return False
+
+
+def _finish(record: dict, payload: dict):
+    batch_id = record["batchId"]
+    if not _claim(batch_id):
+        return
+    try:
+        callback_to_spring(record["callbackUrl"], record["callbackKey"], payload)
+    except Exception as e:
+        # 콜백 실패 시 claim만 풀어 기록을 남겨 두고 다음 주기에 다시 보낸다.
+        print(f"[SUMMARY BATCH] callback failed batch_id={batch_id}: {e}")
+        s3_client.delete_object(Bucket=settings.AWS_BUCKET, Key=_claim_key(batch_id))
+        return
+    s3_client.delete_object(Bucket=settings.AWS_BUCKET, Key=_pending_key(batch_id))
+    s3_client.delete_object(Bucket=settings.AWS_BUCKET, Key=_claim_key(batch_id))
+
+
+def release_stale_claims():
+    """Drop claims left by a process that died mid-callback so their batches are sent again."""
+    paginator = s3_client.get_paginator("list_objects_v2")
+    now = datetime.now(timezone.utc)
+    for page in paginator.paginate(Bucket=settings.AWS_BUCKET, Prefix=f"{settings.SUMMARY_BATCH_S3_PREFIX}claims/"):
+        for obj in page.get("Contents", []):
+            if (now - obj["LastModified"]).total_seconds() > settings.SUMMARY_BATCH_CLAIM_STALE_SECONDS:
+                print(f"[SUMMARY BATCH] releasing stale claim key={obj['Key']}")
+                s3_client.delete_object(Bucket=settings.AWS_BUCKET, Key=obj["Key"])
+
+
+def _pending_keys():
+    paginator = s3_client.get_paginator("list_objects_v2")
+    prefix = f"{settings.SUMMARY_BATCH_S3_PREFIX}pending/"
+    for page in paginator.paginate(Bucket=settings.AWS_BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith(".json"):
+                yield obj["Key"]
+
+
+def poll_summary_batches():
+    """Check every pending summary batch once and send the Spring callback for those that finished."""
+    for key in _pending_keys():
+        try:
+            body = s3_client.get_object(Bucket=settings.AWS_BUCKET, Key=key)["Body"].read()
+            record = json.loads(body)
+        except (ClientError, ValueError) as e:
+            print(f"[SUMMARY BATCH] cannot read record key={key}: {e}")
+            continue
+        payload = dict(record["payload"])
+        try:
+            summary = fetch_summary_batch(record["batchId"])
+        except RETRYABLE_OPENAI_ERRORS as e:
+            # 재시도까지 모두 실패한 일시 오류는 배치 실패가 아니므로 다음 주기에 다시 확인한다.
+            print(f"[SUMMARY BATCH] status check failed batch_id={record['batchId']}: {e!r}")
+            continue
+        except Exception as e:
+            print(f"[SUMMARY BATCH] batch_id={record['batchId']} failed: {e!r}")
+            # STT는 성공했으므로 녹취록(sttText)은 FAILED 콜백에도 그대로 실어 보낸다.
+            payload.update(status="FAILED", aiText=None, errorMessage=str(e))
+            _finish(record, payload)
+            continue
+        if summary is None:
+            continue
+        payload["aiText"] = summary
+        print(f"[SUMMARY BATCH] batch_id={record['batchId']} meetNo={payload.get('meetNo')} ai_len={len(summary)}")
+        _finish(record, payload)
+
+
+async def run_summary_batch_poller():
+    """Background task for the app lifespan: poll pending summary batches every SUMMARY_BATCH_POLL_SECONDS."""
+    try:
+        await asyncio.to_thread(release_stale_claims)
+    except Exception as e:
+        print(f"[SUMMARY BATCH] stale claim cleanup failed: {e!r}")
+    while True:
+        try:
+            await asyncio.to_thread(poll_summary_batches)
+        except Exception as e:
+            print(f"[SUMMARY BATCH] poll failed: {e!r}")
+        await asyncio.sleep(settings.SUMMARY_BATCH_POLL_SECONDS)